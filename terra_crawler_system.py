@@ -1,5 +1,5 @@
 # Meta-Crawler Kern mit Logging, Zeitplan, Live-Übersicht, KI-Modell und Deployment-Start
-from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify, Response
+from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify, Response, g, send_file
 import os
 import logging
 import time
@@ -9,7 +9,16 @@ import requests
 import sqlite3
 import schedule
 import threading
-from datetime import datetime, timedelta
+import random
+import math
+import uuid
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from datetime import datetime, timedelta, timezone
 import folium
 from folium.plugins import HeatMap
 
@@ -35,22 +44,26 @@ meta_sources = {
     "USGS": {
         "type": "json",
         "url": "https://earthquake.usgs.gov/fdsnws/event/1/query?format=geojson&limit=10",
-        "parser": "usgs_parser"
+        "parser": "usgs_parser",
+        "rate_limit": {"rate": 1.0, "burst": 5, "daily_quota": None}
     },
     "OpenMeteo": {
         "type": "weather",
         "url_template": "https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=temperature_2m&timezone=UTC",
-        "parser": "openmeteo_parser"
+        "parser": "openmeteo_parser",
+        "rate_limit": {"rate": 5.0, "burst": 10, "daily_quota": 10000}
     },
     "NASA-FIRMS": {
         "type": "csv",
         "url": "https://firms.modaps.eosdis.nasa.gov/data/active_fire/viirs/csv/MODIS_C6_USA_contiguous_and_Hawaii_24h.csv",
-        "parser": "nasa_firms_parser"
+        "parser": "nasa_firms_parser",
+        "rate_limit": {"rate": 0.2, "burst": 2, "daily_quota": 1000}
     },
     "DAI-SPARQL": {
         "type": "sparql",
         "url": "https://gazetteer.dainst.org/sparql",
-        "parser": "dai_sparql_parser"
+        "parser": "dai_sparql_parser",
+        "rate_limit": {"rate": 0.5, "burst": 2, "daily_quota": None}
     }
 }
 
@@ -69,6 +82,7 @@ def login():
             row = conn.execute("SELECT * FROM users WHERE username=? AND password=?", (user, pw)).fetchone()
         if row:
             session["user"] = user
+            session["role"] = row[2]
             return redirect(url_for("crawler_dashboard"))
         error = "Zugangsdaten falsch"
     return render_template_string('''<h2>Login</h2>
@@ -82,27 +96,102 @@ def login():
 @app.route("/logout")
 def logout():
     session.pop("user", None)
+    session.pop("role", None)
     return redirect("/login")
 
-# Quellen-Webinterface pro Projekt
-@app.route("/project/<project_id>/sources", methods=["GET", "POST"])
-def project_source_toggle(project_id):
-    with sqlite3.connect(DB_NAME) as conn:
-        conn.execute('''CREATE TABLE IF NOT EXISTS project_sources (
+# Quellen-Konfiguration pro Projekt, Schlüssel (project_id, source)
+PROJECT_SOURCE_FIELDS = ("active", "priority", "interval_seconds", "backoff_until")
+
+def ensure_project_sources_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS project_sources (
     project_id TEXT,
     source TEXT,
     active INTEGER DEFAULT 1,
     priority INTEGER DEFAULT 0,
     interval_seconds INTEGER DEFAULT 300,
     last_run TEXT,
-    backoff_until TEXT
+    backoff_until TEXT,
+    PRIMARY KEY (project_id, source)
 )''')
+    if any(c[5] for c in conn.execute("PRAGMA table_info(project_sources)")):
+        return
+    # Alt-Tabelle ohne Primärschlüssel: letzte gespeicherte Zeile je (project_id, source) übernehmen
+    conn.execute("BEGIN IMMEDIATE")
+    cols = conn.execute("PRAGMA table_info(project_sources)").fetchall()
+    if any(c[5] for c in cols):
         conn.commit()
+        return
+    names = [c[1] for c in cols]
+    def col(name, default="NULL"):
+        return name if name in names else default
+    logging.info("Migriere project_sources auf Schlüssel (project_id, source)")
+    conn.execute("ALTER TABLE project_sources RENAME TO project_sources_old")
+    ensure_project_sources_table(conn)
+    conn.execute(f'''INSERT INTO project_sources (project_id, source, active, priority, interval_seconds, last_run, backoff_until)
+                     SELECT project_id, source, COALESCE(active, 1), COALESCE({col("priority")}, 0),
+                            COALESCE({col("interval_seconds")}, 300), {col("last_run")}, {col("backoff_until")}
+                     FROM project_sources_old
+                     WHERE rowid IN (SELECT MAX(rowid) FROM project_sources_old GROUP BY project_id, source)''')
+    conn.execute("DROP TABLE project_sources_old")
+    conn.commit()
+
+def _validate_source_entry(e):
+    # Prüft einen Konfigurationseintrag und normalisiert die Werte; fehlende Felder bleiben unverändert
+    if not isinstance(e, dict):
+        raise ValueError(f"Objekt erwartet: {e!r}")
+    if not isinstance(e.get("project_id"), str) or not e["project_id"]:
+        raise ValueError(f"project_id muss ein nicht-leerer String sein: {e!r}")
+    if not isinstance(e.get("source"), str) or e["source"] not in meta_sources:
+        raise ValueError(f"Unbekannte Quelle: {e.get('source')!r}")
+    entry = {"project_id": e["project_id"], "source": e["source"]}
+    for f in ("active", "priority", "interval_seconds"):
+        if f in e:
+            if not isinstance(e[f], int) or (isinstance(e[f], bool) and f != "active"):
+                raise ValueError(f"{f} muss eine Ganzzahl sein: {e!r}")
+            entry[f] = int(e[f])
+    if "active" in entry and entry["active"] not in (0, 1):
+        raise ValueError(f"active muss 0 oder 1 sein: {e!r}")
+    if entry.get("interval_seconds", 1) <= 0:
+        raise ValueError(f"interval_seconds muss positiv sein: {e!r}")
+    if "backoff_until" in e:
+        value = e["backoff_until"]
+        if value is not None:
+            try:
+                until = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"backoff_until muss ein ISO-Zeitstempel oder null sein: {e!r}")
+            if until.tzinfo:
+                until = until.astimezone(timezone.utc).replace(tzinfo=None)
+            value = until.isoformat()
+        entry["backoff_until"] = value
+    return entry
+
+def upsert_project_sources(conn, entries):
+    # Einträge pro (project_id, source) in Listenreihenfolge zusammenführen, damit der letzte gewinnt
+    merged = {}
+    for e in map(_validate_source_entry, entries):
+        merged.setdefault((e["project_id"], e["source"]), {}).update(e)
+    entries = list(merged.values())
+    conn.executemany("INSERT OR IGNORE INTO project_sources (project_id, source) VALUES (?, ?)",
+                     [(e["project_id"], e["source"]) for e in entries])
+    # Nur übergebene Felder setzen; ein explizites null schreibt NULL (z. B. Backoff aufheben)
+    groups = {}
+    for e in entries:
+        fields = tuple(f for f in PROJECT_SOURCE_FIELDS if f in e)
+        if fields:
+            groups.setdefault(fields, []).append(tuple(e[f] for f in fields) + (e["project_id"], e["source"]))
+    for fields, params in groups.items():
+        conn.executemany(f"UPDATE project_sources SET {', '.join(f + '=?' for f in fields)} WHERE project_id=? AND source=?", params)
+    conn.commit()
+    invalidate_source_cache()
+
+@app.route("/project/<project_id>/sources", methods=["GET", "POST"])
+def project_source_toggle(project_id):
+    with sqlite3.connect(DB_NAME) as conn:
+        ensure_project_sources_table(conn)
         if request.method == "POST":
-            for source in meta_sources.keys():
-                active = 1 if request.form.get(source) == "on" else 0
-                conn.execute("REPLACE INTO project_sources (project_id, source, active) VALUES (?, ?, ?)", (project_id, source, active))
-            conn.commit()
+            upsert_project_sources(conn, [{"project_id": project_id, "source": source, "active": 1 if request.form.get(source) == "on" else 0}
+                                          for source in meta_sources.keys()])
         sources = conn.execute("SELECT source, active FROM project_sources WHERE project_id=?", (project_id,)).fetchall()
     return render_template_string('''
         <h2>Quellensteuerung für Projekt {{ project_id }}</h2>
@@ -115,6 +204,26 @@ def project_source_toggle(project_id):
         <a href="/crawler/dashboard">Zurück</a>
     ''', project_id=project_id, sources=sources)
 
+# Massenkonfiguration als JSON: [{"project_id": ..., "source": ..., "active": 1, "priority": 0, "interval_seconds": 300, "backoff_until": null}, ...]
+@app.route("/project_sources/bulk", methods=["GET", "POST"])
+def project_sources_bulk():
+    with sqlite3.connect(DB_NAME) as conn:
+        ensure_project_sources_table(conn)
+        if request.method == "POST":
+            entries = request.get_json(silent=True)
+            if not isinstance(entries, list):
+                return jsonify({"error": "Liste von Objekten erwartet"}), 400
+            try:
+                upsert_project_sources(conn, entries)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({"updated": len(entries), "version": _source_cache["version"]})
+        project_id = request.args.get("project_id")
+        query = "SELECT project_id, source, active, priority, interval_seconds, last_run, backoff_until FROM project_sources"
+        rows = conn.execute(query + " WHERE project_id=?", (project_id,)).fetchall() if project_id else conn.execute(query).fetchall()
+    cols = ["project_id", "source", "active", "priority", "interval_seconds", "last_run", "backoff_until"]
+    return jsonify([dict(zip(cols, row)) for row in rows])
+
 # Relevanz-Zeitreihe als Chart.js
 @app.route("/crawler/relevance_chart_data/<project_id>")
 def relevance_chart_data(project_id):
@@ -320,6 +429,8 @@ def crawler_dashboard():
                 # Relevanzberechnung vorbereiten
         crawl_counts = {}
         for log in log_data:
+            if log['status'] not in ('ok', 'fail', 'error'):
+                continue
             key = (log['project_id'], log['source'])
             crawl_counts.setdefault(key, {'ok': 0, 'fail': 0, 'error': 0, 'total': 0})
             crawl_counts[key][log['status']] += 1
@@ -521,9 +632,13 @@ def log_crawl(project_id, source, status, trigger_type="auto"):
                             source TEXT,
                             last_run TEXT,
                             status TEXT,
-                            trigger_type TEXT
+                            trigger_type TEXT,
+                            run_id TEXT
                         )''')
-        conn.execute("INSERT INTO crawl_log VALUES (?, ?, ?, ?, ?)", (project_id, source, datetime.utcnow().isoformat(), status, trigger_type))
+        if "run_id" not in [c[1] for c in conn.execute("PRAGMA table_info(crawl_log)")]:
+            conn.execute("ALTER TABLE crawl_log ADD COLUMN run_id TEXT")
+        conn.execute("INSERT INTO crawl_log (project_id, source, last_run, status, trigger_type, run_id) VALUES (?, ?, ?, ?, ?, ?)",
+                     (project_id, source, datetime.utcnow().isoformat(), status, trigger_type, current_profile_run_id()))
         conn.commit()
     if os.path.exists(CRAWL_LOG_PATH):
         with open(CRAWL_LOG_PATH, newline='') as f:
@@ -535,30 +650,212 @@ def log_crawl(project_id, source, status, trigger_type="auto"):
         writer = csv.writer(f)
         writer.writerows(rows)
 
-def get_active_sources(project_id):
-    now = datetime.utcnow().isoformat()
+# Versionierter In-Process-Cache der Quellen-Konfiguration; jede Änderung erhöht die Version.
+# Änderungen aus anderen Prozessen werden spätestens nach SOURCE_CACHE_TTL Sekunden sichtbar.
+SOURCE_CACHE_TTL = 60
+_source_cache = {"version": 0, "projects": {}}
+_source_cache_lock = threading.Lock()
+
+def invalidate_source_cache():
+    with _source_cache_lock:
+        _source_cache["version"] += 1
+        _source_cache["projects"] = {}
 
+def get_source_config(project_id):
+    now = time.time()
+    with _source_cache_lock:
+        version = _source_cache["version"]
+        cached = _source_cache["projects"].get(project_id)
+    if cached and cached[0] == version and now - cached[1] < SOURCE_CACHE_TTL:
+        return cached[2]
     with sqlite3.connect(DB_NAME) as conn:
-        conn.execute('''CREATE TABLE IF NOT EXISTS project_sources (
-                            project_id TEXT,
-                            source TEXT,
-                            active INTEGER DEFAULT 1,
-                            priority INTEGER DEFAULT 0
-                        )''')
-        conn.commit()
+        ensure_project_sources_table(conn)
         rows = conn.execute("""
-            SELECT source FROM project_sources
-            WHERE project_id=? AND active=1 AND (backoff_until IS NULL OR backoff_until < ?)
-        """, (project_id, now)).fetchall()
-        return [r[0] for r in rows] if rows else list(meta_sources.keys())
+            SELECT source, active, priority, backoff_until FROM project_sources
+            WHERE project_id=? ORDER BY priority DESC
+        """, (project_id,)).fetchall()
+    with _source_cache_lock:
+        if _source_cache["version"] == version:
+            _source_cache["projects"][project_id] = (version, now, rows)
+    return rows
+
+def get_active_sources(project_id):
+    # Quellen ohne Zeile gelten mit den Spaltenvorgaben (active=1, priority=0) als aktiv
+    now = datetime.utcnow().isoformat()
+    config = {source: (active, priority, backoff_until) for source, active, priority, backoff_until in get_source_config(project_id)}
+    active_sources = []
+    for source in meta_sources:
+        active, priority, backoff_until = config.get(source, (1, 0, None))
+        if active and (backoff_until is None or backoff_until < now):
+            active_sources.append((source, priority or 0))
+    active_sources.sort(key=lambda x: x[1], reverse=True)
+    return [source for source, _ in active_sources]
 
 def update_backoff(project_id, source, minutes=10):
     until = (datetime.utcnow() + timedelta(minutes=minutes)).isoformat()
     with sqlite3.connect(DB_NAME) as conn:
-        conn.execute("UPDATE project_sources SET backoff_until=? WHERE project_id=? AND source=?", (until, project_id, source))
+        ensure_project_sources_table(conn)
+        conn.execute("INSERT INTO project_sources (project_id, source, backoff_until) VALUES (?, ?, ?) "
+                     "ON CONFLICT(project_id, source) DO UPDATE SET backoff_until=excluded.backoff_until", (project_id, source, until))
         conn.commit()
+    invalidate_source_cache()
+
+# Rate-Limiting pro Host (Token-Bucket in SQLite, gilt über Threads und Prozesse hinweg)
+RATE_LIMIT_DEFAULT = {"rate": 1.0, "burst": 1, "daily_quota": None}
+RATE_LIMIT_MAX_RETRIES = 3
+RATE_LIMIT_MAX_WAIT = 20  # Sekunden pro Anfrage inkl. Wiederholungen, danach Backoff statt Blockade
+_rate_limit_lock = threading.Lock()
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message, retry_after=60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _rate_limit_conn():
+    conn = sqlite3.connect(DB_NAME, timeout=30, isolation_level=None)
+    conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+                        host TEXT PRIMARY KEY,
+                        tokens REAL,
+                        rate REAL,
+                        burst REAL,
+                        updated_at REAL,
+                        blocked_until REAL DEFAULT 0
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS rate_quota (
+                        source TEXT,
+                        day TEXT,
+                        used INTEGER DEFAULT 0,
+                        PRIMARY KEY (source, day)
+                    )''')
+    return conn
+
+def _take_rate_token(source, host, config):
+    # Liefert 0 bei Erfolg, sonst die Wartezeit in Sekunden bis zum nächsten Token
+    now = time.time()
+    day = datetime.utcnow().date().isoformat()
+    conn = _rate_limit_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT tokens, rate, updated_at, blocked_until FROM rate_limits WHERE host=?", (host,)).fetchone()
+        if row:
+            tokens, rate, updated_at, blocked_until = row
+            rate = min(rate, config["rate"])
+            tokens = min(config["burst"], tokens + (now - updated_at) * rate)
+        else:
+            tokens, rate, blocked_until = float(config["burst"]), config["rate"], 0
+        if blocked_until and blocked_until > now:
+            conn.execute("ROLLBACK")
+            return blocked_until - now
+        quota = config.get("daily_quota")
+        if quota:
+            used = conn.execute("SELECT used FROM rate_quota WHERE source=? AND day=?", (source, day)).fetchone()
+            if used and used[0] >= quota:
+                conn.execute("ROLLBACK")
+                midnight = datetime.combine(datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+                raise RateLimitExceeded(f"Tageskontingent für {source} erschöpft ({quota})",
+                                        (midnight - datetime.utcnow()).total_seconds())
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+            conn.execute("INSERT INTO rate_quota (source, day, used) VALUES (?, ?, 1) "
+                         "ON CONFLICT(source, day) DO UPDATE SET used = used + 1", (source, day))
+        else:
+            wait = (1 - tokens) / rate
+        conn.execute("REPLACE INTO rate_limits (host, tokens, rate, burst, updated_at, blocked_until) VALUES (?, ?, ?, ?, ?, ?)",
+                     (host, tokens, rate, config["burst"], now, blocked_until or 0))
+        conn.execute("COMMIT")
+        return wait
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def acquire_rate_token(source, url, deadline=None):
+    """Wartet, bis für den Host der URL ein Token frei ist, höchstens bis deadline (sonst RATE_LIMIT_MAX_WAIT)."""
+    config = dict(RATE_LIMIT_DEFAULT, **meta_sources.get(source, {}).get("rate_limit", {}))
+    host = urlparse(url).netloc
+    deadline = deadline or time.time() + RATE_LIMIT_MAX_WAIT
+    while True:
+        with _rate_limit_lock:
+            wait = _take_rate_token(source, host, config)
+        if wait <= 0:
+            return
+        if time.time() + wait > deadline:
+            raise RateLimitExceeded(f"Rate-Limit für {host} ({source}): Wartezeit {wait:.0f}s zu lang", wait)
+        logging.info(f"Rate-Limit für {host} ({source}) – warte {wait:.1f}s")
+        time.sleep(wait)
+
+def _parse_retry_after(value, default=60):
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        until = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, (until - datetime.now(until.tzinfo)).total_seconds())
+
+def update_rate_limit(source, url, response):
+    # 429/503 mit Retry-After sperren den Host und halbieren die Rate; Erfolge erhöhen sie wieder bis zum Konfigurationswert
+    config = dict(RATE_LIMIT_DEFAULT, **meta_sources.get(source, {}).get("rate_limit", {}))
+    host = urlparse(url).netloc
+    throttled = response.status_code == 429 or (response.status_code == 503 and "Retry-After" in response.headers)
+    with _rate_limit_lock:
+        conn = _rate_limit_conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT rate FROM rate_limits WHERE host=?", (host,)).fetchone()
+            rate = min(row[0], config["rate"]) if row else config["rate"]
+            if throttled:
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                rate = max(rate / 2, config["rate"] / 64)
+                conn.execute("UPDATE rate_limits SET tokens=0, rate=?, updated_at=?, blocked_until=? WHERE host=?",
+                             (rate, time.time(), time.time() + retry_after, host))
+                logging.warning(f"{response.status_code} von {host} ({source}) – Pause {retry_after:.0f}s, neue Rate {rate:.3f}/s")
+            elif response.status_code < 400:
+                conn.execute("UPDATE rate_limits SET rate=? WHERE host=?", (min(config["rate"], rate * 1.1), host))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+    return throttled
+
+def rate_limited_request(source, method, url, **kwargs):
+    deadline = time.time() + RATE_LIMIT_MAX_WAIT
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        acquire_rate_token(source, url, deadline)
+        response = requests.request(method, url, **kwargs)
+        if not update_rate_limit(source, url, response) or attempt == RATE_LIMIT_MAX_RETRIES:
+            return response
+
+@app.route("/crawler/rate_limits.json")
+def crawler_rate_limits_json():
+    day = datetime.utcnow().date().isoformat()
+    conn = _rate_limit_conn()
+    try:
+        limits = conn.execute("SELECT host, tokens, rate, burst, updated_at, blocked_until FROM rate_limits").fetchall()
+        quota = dict(conn.execute("SELECT source, used FROM rate_quota WHERE day=?", (day,)).fetchall())
+    finally:
+        conn.close()
+    return jsonify({
+        "hosts": [dict(zip(["host", "tokens", "rate", "burst", "updated_at", "blocked_until"], row)) for row in limits],
+        "quota": {name: {"used": quota.get(name, 0), "daily_quota": cfg.get("rate_limit", {}).get("daily_quota")}
+                  for name, cfg in meta_sources.items()}
+    })
 
 def meta_crawler_run(project_id, override_source=None):
+    with profiled("project", project_id, project_id, override_source):
+        _meta_crawler_run(project_id, override_source)
+
+def _meta_crawler_run(project_id, override_source=None):
     meta_crawler_cleanup(project_id)
 
     # KI-Relevanzbewertung pro Quelle abrufen und sortieren
@@ -567,7 +864,7 @@ def meta_crawler_run(project_id, override_source=None):
         with open(CRAWL_LOG_PATH, newline='') as f:
             reader = csv.DictReader(f)
             for row in reader:
-                if row['project_id'] != project_id:
+                if row['project_id'] != project_id or row['status'] not in ('ok', 'fail', 'error'):
                     continue
                 key = row['source']
                 crawl_scores.setdefault(key, {'ok': 0, 'fail': 0, 'error': 0})
@@ -582,6 +879,9 @@ def meta_crawler_run(project_id, override_source=None):
     relevance_order.sort(key=lambda x: x[1], reverse=True)  # höchste Relevanz zuerst
 
     sorted_sources = [s for s, _ in relevance_order] if relevance_order else list(meta_sources.keys())
+    # Konfigurierte Priorität zuerst, innerhalb gleicher Priorität nach Relevanz
+    priorities = {source: priority for source, _, priority, _ in get_source_config(project_id)}
+    sorted_sources.sort(key=lambda s: priorities.get(s, 0), reverse=True)
     logging.info(f"Starte Meta-Crawler für Projekt {project_id}")
     active_sources = get_active_sources(project_id)
     for name in sorted_sources:
@@ -593,20 +893,21 @@ def meta_crawler_run(project_id, override_source=None):
         if name not in active_sources:
             logging.info(f"Quelle {name} für Projekt {project_id} deaktiviert – übersprungen.")
             continue
+        source_profile = start_profile("source", name, project_id, name)
         try:
             status = "ok"
             if config["type"] == "json":
-                response = requests.get(config["url"])
+                response = rate_limited_request(name, "GET", config["url"])
                 if response.status_code == 200:
                     if config["parser"] == "usgs_parser":
                         usgs_parser(response.json(), project_id)
             elif config["type"] == "csv":
-                response = requests.get(config["url"])
+                response = rate_limited_request(name, "GET", config["url"])
                 if response.status_code != 200:
                     status = "fail"
             elif config["type"] == "sparql":
                 headers = {"Accept": "application/sparql-results+json"}
-                r = requests.post(config["url"], data={"query": "SELECT ?name ?lat ?lon WHERE {?place rdfs:label ?name ; geo:lat ?lat ; geo:long ?lon } LIMIT 5"}, headers=headers)
+                r = rate_limited_request(name, "POST", config["url"], data={"query": "SELECT ?name ?lat ?lon WHERE {?place rdfs:label ?name ; geo:lat ?lat ; geo:long ?lon } LIMIT 5"}, headers=headers)
                 if r.status_code != 200:
                     status = "fail"
             elif config["type"] == "weather":
@@ -614,7 +915,7 @@ def meta_crawler_run(project_id, override_source=None):
                 if center:
                     lat, lon = center
                     url = config["url_template"].format(lat=lat, lon=lon)
-                    response = requests.get(url)
+                    response = rate_limited_request(name, "GET", url)
                     if response.status_code != 200:
                         status = "fail"
             log_crawl(project_id, name, status)
@@ -622,9 +923,15 @@ def meta_crawler_run(project_id, override_source=None):
                 update_backoff(project_id, name, 10)
             if status in ["fail", "error"]:
                 send_alert_email(project_id, name, status)
+        except RateLimitExceeded as e:
+            logging.warning(f"Quelle {name} für Projekt {project_id} zurückgestellt: {e}")
+            log_crawl(project_id, name, "deferred")
+            update_backoff(project_id, name, max(1, math.ceil(e.retry_after / 60)))
         except Exception as e:
             log_crawl(project_id, name, "error")
             logging.error(f"Fehler bei Quelle {name}: {e}")
+        finally:
+            stop_profile(source_profile)
 
 def start_meta_crawler_scheduler(project_id):
     def schedule_project_sources():
@@ -716,3 +1023,268 @@ def get_project_center(project_id):
     with sqlite3.connect("terrasignum_data.db") as conn:
         row = conn.execute("SELECT AVG(latitude), AVG(longitude) FROM project_entries WHERE project_id=?", (project_id,)).fetchone()
     return row if row and row[0] and row[1] else None
+
+# Profiling auf Abruf: CPU (cProfile) und Speicher (tracemalloc) pro Projekt, Quelle oder Route
+PROFILE_DIR = 'profiles'
+PROFILE_KEEP = 200
+PROFILE_TRACEMALLOC_FRAMES = 5
+PROFILE_TARGET_TTL = 5
+PROFILE_KINDS = ("project", "source", "route")
+PROFILE_SORT_KEYS = {k.value for k in pstats.SortKey}
+_profile_targets = {"loaded": 0, "targets": {}}
+_profile_memory = {"active": 0, "owned": False}  # tracemalloc ist prozessweit, daher Referenzzählung
+_profile_lock = threading.Lock()
+_profile_state = threading.local()
+
+def _profile_conn():
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute('''CREATE TABLE IF NOT EXISTS profiling_targets (
+                        kind TEXT,
+                        target TEXT,
+                        sample_rate REAL DEFAULT 1.0,
+                        memory INTEGER DEFAULT 1,
+                        enabled INTEGER DEFAULT 1,
+                        PRIMARY KEY (kind, target)
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS profile_runs (
+                        run_id TEXT PRIMARY KEY,
+                        kind TEXT,
+                        target TEXT,
+                        project_id TEXT,
+                        source TEXT,
+                        started TEXT,
+                        duration REAL,
+                        cpu_file TEXT,
+                        mem_file TEXT
+                    )''')
+    return conn
+
+def _profile_target(kind, target):
+    now = time.time()
+    with _profile_lock:
+        if now - _profile_targets["loaded"] >= PROFILE_TARGET_TTL:
+            with _profile_conn() as conn:
+                rows = conn.execute("SELECT kind, target, sample_rate, memory FROM profiling_targets WHERE enabled=1").fetchall()
+            _profile_targets["targets"] = {(k, t): (rate, bool(mem)) for k, t, rate, mem in rows}
+            _profile_targets["loaded"] = now
+        return _profile_targets["targets"].get((kind, target))
+
+def current_profile_run_id():
+    return getattr(_profile_state, "run_id", None)
+
+def _snapshot_without_profiler(snapshot):
+    # Allokationen von tracemalloc/cProfile selbst gehören nicht zum Anwendungsprofil
+    return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                   tracemalloc.Filter(False, cProfile.__file__),
+                                   tracemalloc.Filter(False, pstats.__file__)])
+
+def _start_profile(kind, target, project_id, source):
+    if target is None or current_profile_run_id():
+        return None
+    config = _profile_target(kind, target)
+    if not config or random.random() >= config[0]:
+        return None
+    handle = {"run_id": uuid.uuid4().hex, "kind": kind, "target": target, "project_id": project_id, "source": source,
+              "started": datetime.utcnow().isoformat(), "t0": time.perf_counter(), "profiler": None,
+              "memory": config[1]}
+    if handle["memory"]:
+        with _profile_lock:
+            if _profile_memory["active"] == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+                _profile_memory["owned"] = True
+            _profile_memory["active"] += 1
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        handle["profiler"] = profiler
+    except Exception as e:
+        logging.warning(f"CPU-Profil für {kind}={target} nicht möglich: {e}")  # z. B. anderer Profiler aktiv
+    _profile_state.run_id = handle["run_id"]
+    return handle
+
+def _save_profile(handle):
+    duration = time.perf_counter() - handle["t0"]
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    cpu_file = mem_file = None
+    # Speicher-Snapshot zuerst, damit die Statistik-Ausgabe von cProfile nicht mitgezählt wird
+    if handle["memory"] and tracemalloc.is_tracing():
+        mem_file = os.path.join(PROFILE_DIR, f"{handle['run_id']}.tracemalloc")
+        _snapshot_without_profiler(tracemalloc.take_snapshot()).dump(mem_file)
+    if handle["profiler"]:
+        handle["profiler"].disable()
+        cpu_file = os.path.join(PROFILE_DIR, f"{handle['run_id']}.prof")
+        handle["profiler"].dump_stats(cpu_file)
+    with _profile_conn() as conn:
+        conn.execute("INSERT INTO profile_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (handle["run_id"], handle["kind"], handle["target"], handle["project_id"], handle["source"],
+                      handle["started"], duration, cpu_file, mem_file))
+        old = conn.execute("SELECT run_id, cpu_file, mem_file FROM profile_runs ORDER BY started DESC LIMIT -1 OFFSET ?", (PROFILE_KEEP,)).fetchall()
+        for run_id, *files in old:
+            for path in files:
+                if path and os.path.exists(path):
+                    os.remove(path)
+            conn.execute("DELETE FROM profile_runs WHERE run_id=?", (run_id,))
+        conn.commit()
+    logging.info(f"Profil {handle['run_id']} gespeichert ({handle['kind']}={handle['target']}, {duration:.2f}s)")
+
+def _release_profile(handle):
+    if handle["profiler"]:
+        handle["profiler"].disable()
+    if handle["memory"]:
+        with _profile_lock:
+            _profile_memory["active"] -= 1
+            if _profile_memory["active"] == 0 and _profile_memory["owned"]:
+                tracemalloc.stop()
+                _profile_memory["owned"] = False
+
+# Fehler beim Profiling werden nur geloggt und dürfen Crawl oder Request nie beeinflussen
+def start_profile(kind, target, project_id=None, source=None):
+    # Liefert ein Handle, wenn für das Ziel Profiling aktiv ist und die Stichprobe greift, sonst None
+    try:
+        return _start_profile(kind, target, project_id, source)
+    except Exception as e:
+        logging.error(f"Profiling-Start fehlgeschlagen ({kind}={target}): {e}")
+        return None
+
+def stop_profile(handle):
+    if not handle:
+        return
+    _profile_state.run_id = None
+    try:
+        _save_profile(handle)
+    except Exception as e:
+        logging.error(f"Profil {handle['run_id']} konnte nicht gespeichert werden: {e}")
+    finally:
+        try:
+            _release_profile(handle)
+        except Exception as e:
+            logging.error(f"Profil {handle['run_id']} konnte nicht beendet werden: {e}")
+
+@contextmanager
+def profiled(kind, target, project_id=None, source=None):
+    handle = start_profile(kind, target, project_id, source)
+    try:
+        yield handle
+    finally:
+        stop_profile(handle)
+
+@app.before_request
+def _start_route_profile():
+    if request.endpoint and not request.endpoint.startswith("admin_profil"):
+        g.profile = start_profile("route", request.endpoint)
+
+@app.teardown_request
+def _stop_route_profile(exc=None):
+    stop_profile(g.pop("profile", None))
+
+def _require_admin():
+    if "user" not in session:
+        return redirect("/login")
+    with sqlite3.connect(DB_NAME) as conn:
+        row = conn.execute("SELECT role FROM users WHERE username=?", (session["user"],)).fetchone()
+    if not row or row[0] != "admin":
+        return jsonify({"error": "Admin-Rechte erforderlich"}), 403
+    return None
+
+def _int_arg(name, default, maximum=1000):
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        raise ValueError(f"{name} muss eine Ganzzahl sein")
+    if not 1 <= value <= maximum:
+        raise ValueError(f"{name} muss zwischen 1 und {maximum} liegen")
+    return value
+
+@app.route("/admin/profiling/targets", methods=["GET", "POST"])
+def admin_profiling_targets():
+    denied = _require_admin()
+    if denied:
+        return denied
+    with _profile_conn() as conn:
+        if request.method == "POST":
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({"error": "JSON-Objekt erwartet"}), 400
+            if data.get("kind") not in PROFILE_KINDS or not isinstance(data.get("target"), str) or not data["target"]:
+                return jsonify({"error": f"kind ({', '.join(PROFILE_KINDS)}) und target erforderlich"}), 400
+            sample_rate = data.get("sample_rate", 1.0)
+            if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+                return jsonify({"error": "sample_rate muss eine Zahl zwischen 0 und 1 sein"}), 400
+            if not all(isinstance(data.get(f, True), bool) for f in ("memory", "enabled")):
+                return jsonify({"error": "memory und enabled müssen true oder false sein"}), 400
+            conn.execute("REPLACE INTO profiling_targets VALUES (?, ?, ?, ?, ?)",
+                         (data["kind"], data["target"], float(sample_rate),
+                          1 if data.get("memory", True) else 0, 1 if data.get("enabled", True) else 0))
+            conn.commit()
+            with _profile_lock:
+                _profile_targets["loaded"] = 0
+        rows = conn.execute("SELECT * FROM profiling_targets").fetchall()
+    return jsonify([dict(zip(["kind", "target", "sample_rate", "memory", "enabled"], r)) for r in rows])
+
+@app.route("/admin/profiles")
+def admin_profiles():
+    denied = _require_admin()
+    if denied:
+        return denied
+    query, args = "SELECT * FROM profile_runs WHERE 1=1", []
+    for col in ("project_id", "source", "kind", "target"):
+        if request.args.get(col):
+            query += f" AND {col}=?"
+            args.append(request.args[col])
+    with _profile_conn() as conn:
+        rows = conn.execute(query + " ORDER BY started DESC LIMIT 200", args).fetchall()
+    cols = ["run_id", "kind", "target", "project_id", "source", "started", "duration", "cpu_file", "mem_file"]
+    return jsonify([dict(zip(cols, r)) for r in rows])
+
+def _profile_run(run_id):
+    with _profile_conn() as conn:
+        return conn.execute("SELECT cpu_file, mem_file FROM profile_runs WHERE run_id=?", (run_id,)).fetchone()
+
+@app.route("/admin/profiles/<run_id>/<kind>")
+def admin_profile_download(run_id, kind):
+    denied = _require_admin()
+    if denied:
+        return denied
+    row = _profile_run(run_id)
+    path = row and {"cpu": row[0], "memory": row[1]}.get(kind)
+    if not path or not os.path.exists(path):
+        return jsonify({"error": "Profil nicht gefunden"}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=os.path.basename(path))
+
+@app.route("/admin/profiles/<run_id>/summary")
+def admin_profile_summary(run_id):
+    denied = _require_admin()
+    if denied:
+        return denied
+    row = _profile_run(run_id)
+    if not row or not row[0] or not os.path.exists(row[0]):
+        return jsonify({"error": "Profil nicht gefunden"}), 404
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORT_KEYS:
+        return jsonify({"error": f"sort muss einer von {', '.join(sorted(PROFILE_SORT_KEYS))} sein"}), 400
+    try:
+        limit = _int_arg("limit", 30)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    import io
+    out = io.StringIO()
+    pstats.Stats(row[0], stream=out).sort_stats(sort).print_stats(limit)
+    return Response(out.getvalue(), mimetype='text/plain')
+
+@app.route("/admin/profiles/diff")
+def admin_profile_diff():
+    denied = _require_admin()
+    if denied:
+        return denied
+    try:
+        limit = _int_arg("limit", 20)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    base, run = _profile_run(request.args.get("base", "")), _profile_run(request.args.get("run", ""))
+    if not base or not run or not base[1] or not run[1]:
+        return jsonify({"error": "base und run mit Speicherprofil erforderlich"}), 404
+    stats = _snapshot_without_profiler(tracemalloc.Snapshot.load(run[1])).compare_to(
+        _snapshot_without_profiler(tracemalloc.Snapshot.load(base[1])), "lineno")
+    return jsonify([{"location": str(s.traceback), "size_diff": s.size_diff, "size": s.size,
+                     "count_diff": s.count_diff, "count": s.count}
+                    for s in stats[:limit]])
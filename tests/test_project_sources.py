@@ -0,0 +1,41 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def tcs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("terra_crawler_system")
+    monkeypatch.setattr(module, "DB_NAME", str(tmp_path / "test.db"))
+    module.invalidate_source_cache()
+    return module
+
+
+def test_partial_bulk_upsert_keeps_other_sources_active(tcs):
+    client = tcs.app.test_client()
+    resp = client.post("/project_sources/bulk", json=[{"project_id": "X", "source": "USGS", "priority": 5}])
+    assert resp.status_code == 200
+    active = tcs.get_active_sources("X")
+    assert sorted(active) == sorted(tcs.meta_sources)
+    assert active[0] == "USGS"
+
+
+def test_bulk_upsert_last_entry_wins(tcs):
+    client = tcs.app.test_client()
+    resp = client.post("/project_sources/bulk", json=[
+        {"project_id": "Z", "source": "USGS", "active": 0},
+        {"project_id": "Z", "source": "USGS", "active": 1, "priority": 1},
+        {"project_id": "Z", "source": "USGS", "active": 0},
+    ])
+    assert resp.status_code == 200
+    rows = client.get("/project_sources/bulk?project_id=Z").get_json()
+    assert rows == [dict(rows[0], active=0, priority=1)]
+    assert "USGS" not in tcs.get_active_sources("Z")
+
+
+
+def test_backoff_without_config_row(tcs):
+    tcs.update_backoff("Y", "USGS", 10)
+    assert "USGS" not in tcs.get_active_sources("Y")
+    assert "OpenMeteo" in tcs.get_active_sources("Y")